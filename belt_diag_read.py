@@ -1,7 +1,21 @@
 # belt_diag_read.py
-from time import sleep
+import queue, threading
 from godirect import GoDirect
 
+_DONE = object()  # reader-thread sentinel
+
+def start_reader(dev, q, stop):
+    """Read samples on a background thread so a stalled USB read never blocks the consumer"""
+    def reader():
+        try:
+            while not stop.is_set():
+                q.put(dev.read())
+        finally:
+            q.put(_DONE)
+    t = threading.Thread(target=reader, daemon=True)
+    t.start()
+    return t
+
 def maybe_enable_all(dev):
     # Try the common helper if present
     if hasattr(dev, "enable_sensors"):
@@ -11,22 +25,34 @@ def maybe_enable_all(dev):
         except Exception as e:
             print("enable_sensors() failed:", e)
 
-    # Try to enable by probing indices (some builds use sparse keys; catch KeyError)
-    enabled = 0
-    if hasattr(dev, "get_sensor"):
-        for n in range(0, 256):  # generous range; invalid keys will raise
+    # Most godirect builds store sensors in a private dict (see list_sensors.py)
+    smap = getattr(dev, "_sensors", None)
+    keys = list(smap) if isinstance(smap, dict) else []
+    getter = getattr(dev, "get_sensor", None)
+
+    if keys:
+        # Every key is known to exist, so no KeyError handling is needed
+        sensors = [getter(k) if getter else smap[k] for k in keys]
+    elif getter:
+        # No key list: probe indices, assuming dense keys (stop at the first gap after a hit)
+        sensors = []
+        for n in range(0, 256):
             try:
-                s = dev.get_sensor(n)
+                sensors.append(getter(n))
             except KeyError:
-                continue
+                if sensors:
+                    break
             except Exception as e:
                 # some builds use non-int keys only; bail on weird exceptions
                 break
-            if s is None:
-                continue
-            if hasattr(s, "enabled"):
-                s.enabled = True
-                enabled += 1
+    else:
+        sensors = []
+
+    enabled = 0
+    for s in sensors:
+        if s is not None and hasattr(s, "enabled"):
+            s.enabled = True
+            enabled += 1
     return enabled > 0
 
 def main():
@@ -53,13 +79,19 @@ def main():
         gd.quit(); return
 
     print("Reading for ~5 seconds (printing lists of numbers each tick)...")
+    # The device paces reads at period_ms, so the consumer needs no sleep of its own
+    samples, stop = queue.SimpleQueue(), threading.Event()
+    reader = start_reader(dev, samples, stop)
     try:
         for _ in range(50):
-            vals = dev.read()
+            vals = samples.get()
+            if vals is _DONE:
+                break
             if vals is not None:
                 print(vals)
-            sleep(0.1)
     finally:
+        stop.set()
+        reader.join(timeout=1.0)
         try:
             dev.stop()
         except Exception:
@@ -1,11 +1,20 @@
 # resp_udp.py
-import json, socket, time
+import asyncio, struct, time
 from gdx import gdx
+from unity_udp import connect_udp, dumps, send_nowait
 
 UDP_IP = "127.0.0.1"
 UDP_PORT = 53877
+UDP_ADDR = (UDP_IP, UDP_PORT)
 
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+# Send fixed-layout binary frames instead of JSON (the Unity receiver must decode PACKER's layout).
+# Layout, little-endian, 16 bytes: double t, float force, float resp_rate_bpm.
+# A missing channel is sent as NaN.
+BINARY_FRAMES = False
+PACKER = struct.Struct("<dff")
+FRAME = bytearray(PACKER.size)  # reused for every binary frame
+
+sock = connect_udp(UDP_ADDR)
 
 g = gdx.gdx()
 g.open(connection='usb')
@@ -16,18 +25,41 @@ g.select_sensors([1, 2])
 # 50–100 ms period is a good starting point (20–10 Hz). 10 ms is overkill for Unity.
 g.start(50)
 
-print("Streaming Force (N) and Respiration Rate (bpm) over UDP to", UDP_IP, UDP_PORT)
-try:
+async def read_loop(queue):
+    # g.read() blocks on USB I/O, so run it off the event loop
+    loop = asyncio.get_running_loop()
+    while True:
+        vals = await loop.run_in_executor(None, g.read)
+        await queue.put((time.time(), vals))
+        if vals is None:
+            return
+
+async def send_loop(queue):
     while True:
-        vals = g.read()
+        t, vals = await queue.get()
         if vals is None:
-            break
-        payload = {
-            "t": time.time(),
-            "force": float(vals[0]) if len(vals) > 0 else None,
-            "resp_rate_bpm": float(vals[1]) if len(vals) > 1 else None
-        }
-        sock.sendto(json.dumps(payload).encode("utf-8"), (UDP_IP, UDP_PORT))
+            return
+        if BINARY_FRAMES:
+            force = float(vals[0]) if len(vals) > 0 else float("nan")
+            resp_rate = float(vals[1]) if len(vals) > 1 else float("nan")
+            PACKER.pack_into(FRAME, 0, t, force, resp_rate)
+            data = FRAME
+        else:
+            payload = {
+                "t": t,
+                "force": float(vals[0]) if len(vals) > 0 else None,
+                "resp_rate_bpm": float(vals[1]) if len(vals) > 1 else None
+            }
+            data = dumps(payload)
+        send_nowait(sock, data)
+
+async def main():
+    queue = asyncio.Queue()
+    await asyncio.gather(read_loop(queue), send_loop(queue))
+
+print("Streaming Force (N) and Respiration Rate (bpm) over UDP to", UDP_IP, UDP_PORT)
+try:
+    asyncio.run(main())
 except KeyboardInterrupt:
     pass
 finally:
@@ -1,11 +1,45 @@
 # Enhanced belt sensor data collection
-import json, socket, time
+import argparse, asyncio, logging, time
 from gdx import gdx
+from unity_udp import connect_udp, dumps, send_nowait
 
 UDP_IP = "127.0.0.1"
 UDP_PORT = 53877
+UDP_ADDR = (UDP_IP, UDP_PORT)
 
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+# Minimum seconds between "Data:" debug lines when running with --verbose
+LOG_INTERVAL = 0.5
+
+class RateLimitingFilter(logging.Filter):
+    """Pass at most one DEBUG record per interval; other levels always pass"""
+    def __init__(self, interval):
+        super().__init__()
+        self.interval = interval
+        self._next_allowed = 0.0
+        
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        now = time.monotonic()
+        if now < self._next_allowed:
+            return False
+        self._next_allowed = now + self.interval
+        return True
+
+parser = argparse.ArgumentParser(description="Stream Go Direct Breathing Belt data to Unity over UDP")
+parser.add_argument("--verbose", action="store_true", help="log sent payloads (rate limited)")
+args = parser.parse_args()
+
+# Own handler so the format is not tied to gdx's logging.basicConfig()
+logger = logging.getLogger('belt')
+logger.setLevel(logging.DEBUG if args.verbose else logging.INFO)
+logger.propagate = False
+_handler = logging.StreamHandler()
+_handler.setFormatter(logging.Formatter("%(message)s"))
+logger.addHandler(_handler)
+logger.addFilter(RateLimitingFilter(LOG_INTERVAL))
+
+sock = connect_udp(UDP_ADDR)
 
 g = gdx.gdx()
 g.open(connection='usb')
@@ -47,30 +81,48 @@ sensor_names = {
     5: "step_rate_spm"
 }
 
+# Payload key for each position in g.read()'s values; the selection is fixed from here on
+KEYS = tuple(sensor_names.get(s, f"sensor_{s}") for s in available_sensors)
+
 print(f"\nStreaming data over UDP to {UDP_IP}:{UDP_PORT}")
-print("Available data channels:", [sensor_names.get(s, f"sensor_{s}") for s in available_sensors])
+print("Available data channels:", list(KEYS))
 
-try:
+async def read_loop(queue):
+    """Read samples off the event loop so a slow USB read never stalls sending"""
+    loop = asyncio.get_running_loop()
     while True:
-        vals = g.read()
+        vals = await loop.run_in_executor(None, g.read)
+        await queue.put((time.time(), vals))
         if vals is None:
-            break
+            return
+
+async def send_loop(queue):
+    """Build payloads from queued samples and send them to Unity"""
+    while True:
+        t, vals = await queue.get()
+        if vals is None:
+            return
             
         # Build payload with all available sensor data
-        payload = {"t": time.time()}
+        payload = {"t": t}
         
-        for i, sensor_num in enumerate(available_sensors):
-            if i < len(vals) and vals[i] is not None:
-                sensor_name = sensor_names.get(sensor_num, f"sensor_{sensor_num}")
-                payload[sensor_name] = float(vals[i])
+        for key, v in zip(KEYS, vals):
+            if v is not None:
+                payload[key] = float(v)
         
         # Send data to Unity
-        sock.sendto(json.dumps(payload).encode("utf-8"), (UDP_IP, UDP_PORT))
+        send_nowait(sock, dumps(payload))
         
-        # Print data for debugging (optional)
+        # Log data for debugging; at INFO the payload is never formatted
         if len(payload) > 1:  # More than just timestamp
-            print(f"Data: {payload}")
-            
+            logger.debug("Data: %s", payload)
+
+async def main():
+    queue = asyncio.Queue()
+    await asyncio.gather(read_loop(queue), send_loop(queue))
+
+try:
+    asyncio.run(main())
 except KeyboardInterrupt:
     print("\nStopping data collection...")
 except Exception as e:
@@ -1,65 +1,103 @@
 # Enhanced Breathing Analysis - Extract more data from existing sensors
-import json, socket, time, statistics
-from collections import deque
+import array, asyncio, math, struct, time
 from gdx import gdx
+from unity_udp import connect_udp, dumps, send_nowait
 
 UDP_IP = "127.0.0.1"
 UDP_PORT = 53877
+UDP_ADDR = (UDP_IP, UDP_PORT)
+
+# Print a monitoring line every PRINT_EVERY samples (40 at 20Hz = every 2 seconds)
+DEBUG = True
+PRINT_EVERY = 40
+
+# Send fixed-layout binary frames instead of JSON (the Unity receiver must decode PACKER's layout)
+BINARY_FRAMES = False
+
+# Binary frame layout, little-endian, 46 bytes:
+#   offset  0  double  t
+#   offset  8  float   force, resp_rate_bpm, breathing_depth, breathing_regularity,
+#                      breathing_intensity, session_duration, avg_resp_rate,
+#                      force_min, force_max (4 bytes each)
+#   offset 44  int8    force_trend, resp_rate_trend
+# force_range is left out because it always equals breathing_depth.
+PACKER = struct.Struct("<d9f2b")
+FRAME = bytearray(PACKER.size)  # reused for every binary frame
 
 class BreathingAnalyzer:
     def __init__(self, window_size=50):  # 50 samples = ~2.5 seconds at 20Hz
         self.window_size = window_size
-        self.force_history = deque(maxlen=window_size)
-        self.resp_rate_history = deque(maxlen=window_size)
-        self.timestamps = deque(maxlen=window_size)
+        # Fixed-size ring buffers of C doubles; _head is the next write slot, _filled the used length
+        self._force_buf = array.array('d', [0.0] * window_size)
+        self._rate_buf = array.array('d', [0.0] * window_size)
+        self._head = 0
+        self._filled = 0
         
         # Breathing cycle detection
         self.last_breath_time = 0
         self.breath_count = 0
-        self.session_start = time.time()
+        self.session_start = time.monotonic()
         
         # Derived metrics
         self.breathing_depth = 0
         self.breathing_regularity = 0
         self.breathing_intensity = 0
+        self.avg_resp_rate = 0
+        self.force_min = 0
+        self.force_max = 0
         
     def add_sample(self, force, resp_rate, timestamp):
         """Add new sensor sample and update analysis"""
-        self.force_history.append(force)
-        self.resp_rate_history.append(resp_rate)
-        self.timestamps.append(timestamp)
+        # timestamp is kept for callers; no current metric needs per-sample times, so it is not stored
+        self._force_buf[self._head] = force
+        self._rate_buf[self._head] = resp_rate
+        self._head = (self._head + 1) % self.window_size
+        if self._filled < self.window_size:
+            self._filled += 1
         
-        self._update_breathing_depth()
-        self._update_breathing_regularity()
-        self._update_breathing_intensity()
+        self._update_metrics()
         
-    def _update_breathing_depth(self):
-        """Calculate breathing depth from force variations"""
-        if len(self.force_history) < 10:
-            return
-            
-        # Breathing depth = range of force values (max - min)
-        self.breathing_depth = max(self.force_history) - min(self.force_history)
+    def _view(self, buf):
+        """Zero-copy view of the filled part of a ring buffer (storage order)"""
+        return memoryview(buf)[:self._filled]
         
-    def _update_breathing_regularity(self):
-        """Calculate breathing regularity from respiration rate consistency"""
-        if len(self.resp_rate_history) < 10:
-            return
-            
-        # Regularity = inverse of standard deviation (lower std = more regular)
-        try:
-            std_dev = statistics.stdev(self.resp_rate_history)
-            self.breathing_regularity = max(0, 1.0 - (std_dev / 10.0))  # Normalize
-        except:
-            self.breathing_regularity = 0
+    def force_window(self):
+        """Force samples currently in the window (storage order, not chronological)"""
+        return self._view(self._force_buf)
+        
+    def _update_metrics(self):
+        """Update all window metrics in a single pass over the force and rate buffers"""
+        n = self._filled
+        forces = self.force_window()
+        fmin = fmax = forces[0]
+        fsum_abs = rsum = rsum_sq = 0.0
+        for f, r in zip(forces, self._view(self._rate_buf)):
+            if f < fmin:
+                fmin = f
+            elif f > fmax:
+                fmax = f
+            fsum_abs += abs(f)
+            rsum += r
+            rsum_sq += r * r
             
-    def _update_breathing_intensity(self):
-        """Calculate breathing intensity from force magnitude"""
-        if len(self.force_history) < 5:
+        self.avg_resp_rate = rsum / n
+        self.force_min = fmin
+        self.force_max = fmax
+        
+        if n < 5:
             return
-            
         # Intensity = average force magnitude
-        self.breathing_intensity = statistics.mean([abs(f) for f in self.force_history])
+        self.breathing_intensity = fsum_abs / n
+        
+        if n < 10:
+            return
+        # Breathing depth = range of force values (max - min)
+        self.breathing_depth = fmax - fmin
+        
+        # Regularity = inverse of standard deviation (lower std = more regular)
+        variance = (rsum_sq - rsum * rsum / n) / (n - 1)  # sample variance, as statistics.stdev
+        std_dev = math.sqrt(max(variance, 0.0))  # clamp rounding error on constant input
+        self.breathing_regularity = max(0, 1.0 - (std_dev / 10.0))  # Normalize
         
     def get_derived_metrics(self):
         """Get all calculated breathing metrics"""
@@ -67,58 +105,61 @@ class BreathingAnalyzer:
             "breathing_depth": self.breathing_depth,
             "breathing_regularity": self.breathing_regularity, 
             "breathing_intensity": self.breathing_intensity,
-            "session_duration": time.time() - self.session_start,
-            "avg_resp_rate": statistics.mean(self.resp_rate_history) if self.resp_rate_history else 0,
-            "force_trend": self._calculate_trend(self.force_history),
-            "resp_rate_trend": self._calculate_trend(self.resp_rate_history)
+            "session_duration": time.monotonic() - self.session_start,
+            "avg_resp_rate": self.avg_resp_rate,
+            "force_trend": self._calculate_trend(self._force_buf),
+            "resp_rate_trend": self._calculate_trend(self._rate_buf)
         }
         
-    def _calculate_trend(self, data):
+    def _calculate_trend(self, buf):
         """Calculate if values are increasing (1), decreasing (-1), or stable (0)"""
-        if len(data) < 5:
+        if self._filled < 5:
             return 0
             
-        recent = list(data)[-5:]
-        if recent[-1] > recent[0] + 0.1:
+        # Compare the newest sample with the one four writes earlier
+        newest = buf[self._head - 1]
+        oldest = buf[self._head - 5]
+        if newest > oldest + 0.1:
             return 1  # Increasing
-        elif recent[-1] < recent[0] - 0.1:
+        elif newest < oldest - 0.1:
             return -1  # Decreasing
         else:
             return 0  # Stable
 
-def main():
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    analyzer = BreathingAnalyzer()
-    
-    g = gdx.gdx()
-    g.open(connection='usb')
-    g.select_sensors([1, 2])  # Force and Respiration Rate
-    g.start(50)  # 20Hz sampling
-    
-    print("Enhanced Breathing Analysis - Streaming to Unity")
-    print("Derived metrics:")
-    print("- Breathing Depth: How deep you're breathing")
-    print("- Breathing Regularity: How consistent your breathing pattern is")
-    print("- Breathing Intensity: How hard you're breathing")
-    print("- Force Trend: Whether chest expansion is increasing/decreasing")
-    print("- Resp Rate Trend: Whether breathing rate is changing")
-    
-    try:
-        while True:
-            vals = g.read()
-            if vals is None:
-                break
-                
-            timestamp = time.time()
-            force = float(vals[0]) if len(vals) > 0 and vals[0] is not None else 0
-            resp_rate = float(vals[1]) if len(vals) > 1 and vals[1] is not None else 0
-            
-            # Add sample to analyzer
-            analyzer.add_sample(force, resp_rate, timestamp)
-            
-            # Get derived metrics
-            derived = analyzer.get_derived_metrics()
+async def read_loop(g, queue):
+    """Read samples off the event loop so a slow USB read never stalls analysis"""
+    loop = asyncio.get_running_loop()
+    while True:
+        vals = await loop.run_in_executor(None, g.read)
+        await queue.put((time.time(), vals))
+        if vals is None:
+            return
+
+async def send_loop(queue, sock, analyzer):
+    """Analyze queued samples and stream the derived metrics to Unity"""
+    print_counter = 0
+    while True:
+        timestamp, vals = await queue.get()
+        if vals is None:
+            return
             
+        force = float(vals[0]) if len(vals) > 0 and vals[0] is not None else 0
+        resp_rate = float(vals[1]) if len(vals) > 1 and vals[1] is not None else 0
+        
+        # Add sample to analyzer
+        analyzer.add_sample(force, resp_rate, timestamp)
+        
+        # Get derived metrics
+        derived = analyzer.get_derived_metrics()
+        if BINARY_FRAMES:
+            PACKER.pack_into(
+                FRAME, 0, timestamp, force, resp_rate,
+                derived["breathing_depth"], derived["breathing_regularity"],
+                derived["breathing_intensity"], derived["session_duration"],
+                derived["avg_resp_rate"], analyzer.force_min, analyzer.force_max,
+                derived["force_trend"], derived["resp_rate_trend"])
+            data = FRAME
+        else:
             # Build comprehensive payload
             payload = {
                 "t": timestamp,
@@ -133,20 +174,46 @@ def main():
                 "force_trend": derived["force_trend"],
                 "resp_rate_trend": derived["resp_rate_trend"],
                 # Additional useful metrics
-                "force_min": min(analyzer.force_history) if analyzer.force_history else 0,
-                "force_max": max(analyzer.force_history) if analyzer.force_history else 0,
+                "force_min": analyzer.force_min,
+                "force_max": analyzer.force_max,
                 "force_range": derived["breathing_depth"]
             }
-            
-            # Send to Unity
-            sock.sendto(json.dumps(payload).encode("utf-8"), (UDP_IP, UDP_PORT))
-            
-            # Print every 2 seconds for monitoring
-            if int(timestamp) % 2 == 0:
-                print(f"Force: {force:.2f}N, Rate: {resp_rate:.1f}bpm, "
-                      f"Depth: {derived['breathing_depth']:.2f}, "
-                      f"Regularity: {derived['breathing_regularity']:.2f}")
-            
+            data = dumps(payload)
+        
+        # Send to Unity
+        send_nowait(sock, data)
+        
+        # Print every PRINT_EVERY samples for monitoring
+        print_counter += 1
+        if DEBUG and print_counter % PRINT_EVERY == 0:
+            print(f"Force: {force:.2f}N, Rate: {resp_rate:.1f}bpm, "
+                  f"Depth: {derived['breathing_depth']:.2f}, "
+                  f"Regularity: {derived['breathing_regularity']:.2f}")
+
+async def stream(g, sock, analyzer):
+    """Run the sensor reader and the analysis/send consumer concurrently"""
+    queue = asyncio.Queue()
+    await asyncio.gather(read_loop(g, queue), send_loop(queue, sock, analyzer))
+
+def main():
+    sock = connect_udp(UDP_ADDR)
+    analyzer = BreathingAnalyzer()
+    
+    g = gdx.gdx()
+    g.open(connection='usb')
+    g.select_sensors([1, 2])  # Force and Respiration Rate
+    g.start(50)  # 20Hz sampling
+    
+    print("Enhanced Breathing Analysis - Streaming to Unity")
+    print("Derived metrics:")
+    print("- Breathing Depth: How deep you're breathing")
+    print("- Breathing Regularity: How consistent your breathing pattern is")
+    print("- Breathing Intensity: How hard you're breathing")
+    print("- Force Trend: Whether chest expansion is increasing/decreasing")
+    print("- Resp Rate Trend: Whether breathing rate is changing")
+    
+    try:
+        asyncio.run(stream(g, sock, analyzer))
     except KeyboardInterrupt:
         print("\nStopping enhanced breathing analysis...")
     except Exception as e:
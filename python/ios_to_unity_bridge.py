@@ -1,8 +1,9 @@
 # iOS to Unity Bridge - Receives iOS data and forwards to Unity
-import json
+import selectors
 import socket
 import time
-import threading
+
+from unity_udp import connect_udp, dumps, loads, send_nowait
 
 # iOS app sends to this port
 IOS_PORT = 53878
@@ -11,6 +12,16 @@ IOS_IP = "172.16.68.157"
 # Unity receives on this port (different from belt sensor)
 UNITY_PORT = 53879
 UNITY_IP = "127.0.0.1"  # Local Unity
+UNITY_ADDR = (UNITY_IP, UNITY_PORT)
+
+# Newest iOS packet is forwarded to Unity at this rate; older unsent packets are coalesced
+UNITY_SEND_HZ = 30
+
+# Log every received and sent packet (decodes and formats each one, so off by default)
+DEBUG = False
+
+# Kernel socket buffer size, large enough to absorb bursts from iOS
+SOCKET_BUFFER_BYTES = 1 << 20
 
 class iOSToUnityBridge:
     def __init__(self):
@@ -23,15 +34,35 @@ class iOSToUnityBridge:
         self.last_breathing_phase = ""
         self.last_phase_duration = 0
         
+        # Unity payload reused for every packet; only the iOS-driven fields change
+        self._unity_template = {
+            "heart_rate_bpm": 0,
+            "hrv": 0,
+            "breathing_phase": "",
+            "phase_duration": 0,
+            "force": 0,  # No force data from iOS
+            "resp_rate_bpm": 0,  # No breathing rate data from iOS
+            "steps": 0,  # No step data from iOS
+            "step_rate_spm": 0,  # No step rate from iOS
+            "t": 0
+        }
+        
+        # Newest converted packet waiting for the next Unity flush
+        self._latest = None
+        self._dirty = False
+        
     def start(self):
         """Start the bridge service"""
         try:
             # Create socket to receive from iOS
             self.ios_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.ios_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_BYTES)
             self.ios_socket.bind((IOS_IP, IOS_PORT))
+            self.ios_socket.setblocking(False)
             
             # Create socket to send to Unity
-            self.unity_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.unity_socket = connect_udp(UNITY_ADDR)
+            self.unity_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_BYTES)
             
             self.running = True
             
@@ -40,14 +71,7 @@ class iOSToUnityBridge:
             print(f"🎮 Sending to Unity: {UNITY_IP}:{UNITY_PORT}")
             print("Press Ctrl+C to stop")
             
-            # Start receiving thread
-            receive_thread = threading.Thread(target=self.receive_from_ios)
-            receive_thread.daemon = True
-            receive_thread.start()
-            
-            # Keep main thread alive
-            while self.running:
-                time.sleep(0.1)
+            self.run()
                 
         except KeyboardInterrupt:
             print("\n🛑 Stopping bridge...")
@@ -56,27 +80,56 @@ class iOSToUnityBridge:
         finally:
             self.stop()
     
+    def run(self):
+        """Single-threaded event loop: receive from iOS and flush to Unity at UNITY_SEND_HZ"""
+        sel = selectors.DefaultSelector()
+        sel.register(self.ios_socket, selectors.EVENT_READ, self.receive_from_ios)
+        interval = 1.0 / UNITY_SEND_HZ
+        next_flush = time.monotonic()
+        try:
+            while self.running:
+                # Block until a datagram arrives, or until the next flush when one is pending
+                timeout = max(0.0, next_flush - time.monotonic()) if self._dirty else 1.0
+                for key, _ in sel.select(timeout=timeout):
+                    key.data()
+                
+                now = time.monotonic()
+                if self._dirty and now >= next_flush:
+                    self.flush_to_unity()
+                    # Fixed-rate schedule; after an idle spell the first packet goes out at once
+                    next_flush += interval
+                    if next_flush < now:
+                        next_flush = now + interval
+        finally:
+            sel.close()
+    
     def receive_from_ios(self):
-        """Receive data from iOS app"""
-        while self.running:
+        """Receive every datagram currently queued from the iOS app"""
+        while True:
             try:
                 data, addr = self.ios_socket.recvfrom(1024)
-                json_str = data.decode('utf-8')
-                
-                print(f"📱 Received from iOS ({addr[0]}): {json_str}")
-                
-                # Parse iOS data
-                ios_data = json.loads(json_str)
-                
-                # Convert to Unity format
-                unity_data = self.convert_to_unity_format(ios_data)
-                
-                # Send to Unity
-                self.send_to_unity(unity_data)
-                
+            except BlockingIOError:
+                return
             except Exception as e:
-                if self.running:
-                    print(f"❌ Receive error: {e}")
+                print(f"❌ Receive error: {e}")
+                return
+            self.handle_ios_packet(data, addr)
+    
+    def handle_ios_packet(self, data, addr):
+        """Parse one iOS datagram and queue it for the next Unity flush"""
+        try:
+            if DEBUG:
+                print(f"📱 Received from iOS ({addr[0]}): {data.decode('utf-8', 'replace')}")
+            
+            # Parse iOS data straight from the datagram bytes
+            ios_data = loads(data)
+            
+            # Convert to Unity format; flush_to_unity() sends only the newest one
+            self._latest = self.convert_to_unity_format(ios_data)
+            self._dirty = True
+            
+        except Exception as e:
+            print(f"❌ Receive error: {e}")
     
     def convert_to_unity_format(self, ios_data):
         """Convert iOS JSON to Unity format"""
@@ -84,35 +137,37 @@ class iOSToUnityBridge:
         # Unity format: {"heart_rate_bpm": 75, "hrv": 45.2, "breathing_phase": "inhale", "phase_duration": 2.5, "force": 0, "resp_rate_bpm": 0, "steps": 0, "step_rate_spm": 0, "t": 1234567890}
         
         # Update cached values if new ones are present, otherwise use last known values
-        if "hrv" in ios_data and ios_data["hrv"] > 0:
-            self.last_hrv = ios_data["hrv"]
+        if (hrv := ios_data.get("hrv", 0)) > 0:
+            self.last_hrv = hrv
         
-        if "breathing_phase" in ios_data and ios_data["breathing_phase"]:
-            self.last_breathing_phase = ios_data["breathing_phase"]
+        if phase := ios_data.get("breathing_phase"):
+            self.last_breathing_phase = phase
         
-        if "phase_duration" in ios_data:
-            self.last_phase_duration = ios_data["phase_duration"]
+        if (duration := ios_data.get("phase_duration")) is not None:
+            self.last_phase_duration = duration
         
-        unity_data = {
-            "heart_rate_bpm": ios_data.get("heart_rate", 0),
-            "hrv": self.last_hrv,  # Use cached HRV value
-            "breathing_phase": self.last_breathing_phase,  # Use cached breathing phase
-            "phase_duration": self.last_phase_duration,  # Use cached phase duration
-            "force": 0,  # No force data from iOS
-            "resp_rate_bpm": 0,  # No breathing rate data from iOS
-            "steps": 0,  # No step data from iOS
-            "step_rate_spm": 0,  # No step rate from iOS
-            "t": ios_data.get("timestamp", time.time())
-        }
+        # The constant belt fields stay zero in the template; only update what iOS drives.
+        # The returned dict is shared, so it must be serialized before the next packet is converted.
+        unity_data = self._unity_template
+        unity_data["heart_rate_bpm"] = ios_data.get("heart_rate", 0)
+        unity_data["hrv"] = self.last_hrv  # Use cached HRV value
+        unity_data["breathing_phase"] = self.last_breathing_phase  # Use cached breathing phase
+        unity_data["phase_duration"] = self.last_phase_duration  # Use cached phase duration
+        unity_data["t"] = ios_data.get("timestamp", time.time())
         
         return unity_data
     
+    def flush_to_unity(self):
+        """Send the newest pending iOS packet to Unity"""
+        self.send_to_unity(self._latest)
+        self._dirty = False
+    
     def send_to_unity(self, unity_data):
         """Send data to Unity"""
         try:
-            json_str = json.dumps(unity_data)
-            self.unity_socket.sendto(json_str.encode('utf-8'), (UNITY_IP, UNITY_PORT))
-            print(f"🎮 Sent to Unity: {json_str}")
+            data = dumps(unity_data)
+            if send_nowait(self.unity_socket, data) and DEBUG:
+                print(f"🎮 Sent to Unity: {data.decode('utf-8')}")
         except Exception as e:
             print(f"❌ Send error: {e}")
     
@@ -12,46 +12,55 @@ def discover_sensors():
         g.open(connection='usb')
         print("✓ Connected to Go Direct device")
         
-        # Common sensor numbers to test
-        sensor_tests = [
-            (1, "Force (N)", "Chest expansion/compression force"),
-            (2, "Respiration Rate (bpm)", "Breathing rate"),
-            (3, "Heart Rate (bpm)", "Heart rate"),
-            (4, "Steps", "Step count"),
-            (5, "Activity Level", "Activity intensity"),
-            (6, "Temperature (°C)", "Body temperature"),
-            (7, "Acceleration X (m/s²)", "X-axis acceleration"),
-            (8, "Acceleration Y (m/s²)", "Y-axis acceleration"),
-            (9, "Acceleration Z (m/s²)", "Z-axis acceleration"),
-            (10, "Gyroscope X (deg/s)", "X-axis rotation rate"),
-            (11, "Gyroscope Y (deg/s)", "Y-axis rotation rate"),
-            (12, "Gyroscope Z (deg/s)", "Z-axis rotation rate")
-        ]
+        # Optional notes for the Breathing Belt channels belt_test.py streams; names always come from the device
+        sensor_tests = {
+            1: "Chest expansion/compression force",
+            2: "Breathing rate",
+            4: "Step count",
+            5: "Steps per minute"
+        }
         
-        print("\nTesting sensor availability...")
-        available_sensors = []
+        # The device reports its own sensor list, so there is no need to probe numbers one by one
+        print("\nReading sensor list from device...")
+        labels = {}
+        present = []
+        for number, description, units, incompatible in sorted(g.sensor_info() or [], key=lambda s: s[0]):
+            note = sensor_tests.get(number)
+            labels[number] = (f"{description} ({units})", note)
+            conflicts = [n for n in incompatible if n in present]
+            if conflicts:
+                # Mutually exclusive sensors cannot be enabled in the same pass
+                print(f"✗ Sensor {number}: {labels[number][0]} - Not tested (cannot run with sensor {conflicts[0]})")
+                continue
+            present.append(number)
         
-        for sensor_num, name, description in sensor_tests:
-            try:
-                # Try to select just this sensor
-                g.select_sensors([sensor_num])
-                g.start(50)  # 50ms period
-                
-                # Try to read a few values
-                for _ in range(3):
-                    vals = g.read()
-                    if vals is not None and len(vals) > 0 and vals[0] is not None:
-                        available_sensors.append((sensor_num, name, description))
-                        print(f"✓ Sensor {sensor_num}: {name} - {description}")
-                        break
-                
-                g.stop()
-                
-            except Exception as e:
-                print(f"✗ Sensor {sensor_num}: {name} - Not available")
+        # Validate every listed sensor with a single start/read/stop cycle
+        available_sensors = []
+        if present:
+            g.select_sensors(present)
+            g.start(50)  # 50ms period
+            
+            responding = set()
+            for _ in range(3):
+                vals = g.read()
+                if vals is None:
+                    break
+                responding.update(n for n, v in zip(present, vals) if v is not None)
+                if len(responding) == len(present):
+                    break
+            
+            g.stop()
+            
+            for sensor_num in present:
+                name, note = labels[sensor_num]
+                if sensor_num in responding:
+                    available_sensors.append((sensor_num, name, note))
+                    print(f"✓ Sensor {sensor_num}: {name}" + (f" - {note}" if note else ""))
+                else:
+                    print(f"✗ Sensor {sensor_num}: {name} - Not available")
         
         print(f"\nFound {len(available_sensors)} available sensors:")
-        for sensor_num, name, description in available_sensors:
+        for sensor_num, name, note in available_sensors:
             print(f"  {sensor_num}: {name}")
         
         return [s[0] for s in available_sensors]
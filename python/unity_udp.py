@@ -0,0 +1,33 @@
+# Shared UDP helpers for the scripts that stream data to Unity
+import json, socket
+
+try:
+    import orjson
+    dumps = orjson.dumps
+    loads = orjson.loads
+except ImportError:
+    _encoder = json.JSONEncoder(separators=(",", ":"))
+    def dumps(obj):
+        return _encoder.encode(obj).encode("utf-8")
+    loads = json.loads  # also accepts UTF-8 bytes
+
+def connect_udp(addr):
+    """Non-blocking UDP socket connected to addr (a fixed destination, so each send skips address handling)"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    sock.connect(addr)
+    return sock
+
+def send_nowait(sock, data):
+    """Send one datagram on a socket from connect_udp(); returns False if it was dropped.
+
+    Sends never block or raise for the two expected cases: a full socket buffer
+    (BlockingIOError), and nothing listening at the destination yet. A connected UDP
+    socket reports the latter on a later send as ConnectionRefusedError on Linux and
+    ConnectionResetError (WSAECONNRESET) on Windows, both ConnectionErrors.
+    """
+    try:
+        sock.send(data)
+        return True
+    except (BlockingIOError, ConnectionError):
+        return False